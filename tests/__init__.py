@@ -1,10 +1,16 @@
 """Tests."""
 
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
+import pytest
 import yaml
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader  # type: ignore[assignment]
+
 _DIR = Path(__file__).parent
 BASE_DIR = _DIR.parent
 INTENTS_FILE = BASE_DIR / "intents.yaml"
@@ -13,9 +19,39 @@ LISTS_DIR = BASE_DIR / "lists"
 RULES_DIR = BASE_DIR / "rules"
 TESTS_DIR = BASE_DIR / "tests"
 RESPONSES_DIR = BASE_DIR / "responses"
+INTENTS_CACHE_KEY = "intents/schemas"
 
 LANGUAGES = sorted(p.name for p in SENTENCES_DIR.iterdir() if p.is_dir())
 
+_INTENT_SCHEMAS: Optional[dict[str, Any]] = None
+
+
+def load_intent_schemas(cache: Optional[pytest.Cache] = None) -> dict[str, Any]:
+    """Load intents.yaml once per process.
+
+    conftest.py calls this first with pytest's cache (if enabled), which holds a
+    JSON copy of the file that is re-used while the file is unchanged.
+    """
+    global _INTENT_SCHEMAS
+
+    if _INTENT_SCHEMAS is not None:
+        return _INTENT_SCHEMAS
+
+    mtime = INTENTS_FILE.stat().st_mtime
+    if cache is not None:
+        cached = cache.get(INTENTS_CACHE_KEY, None)
+        if cached and (cached.get("mtime") == mtime):
+            _INTENT_SCHEMAS = cached["intents"]
+            return cached["intents"]
+
+    intent_schemas = yaml.load(INTENTS_FILE.read_bytes(), Loader=SafeLoader)
+
+    if cache is not None:
+        cache.set(INTENTS_CACHE_KEY, {"mtime": mtime, "intents": intent_schemas})
+
+    _INTENT_SCHEMAS = intent_schemas
+    return intent_schemas
+
 
 def load_sentences(language: str) -> dict[str, Any]:
     """Load sentences from sentences/ for a language"""
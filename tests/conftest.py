@@ -9,13 +9,18 @@ import pytest
 import yaml
 from hassil import Intents, merge_dict
 
-from . import INTENTS_FILE, LANGUAGES, RESPONSES_DIR, load_sentences
+from . import LANGUAGES, RESPONSES_DIR, load_intent_schemas, load_sentences
 
 
 def pytest_addoption(parser):
     parser.addoption("--language", action="store", default=None)
 
 
+def pytest_configure(config):
+    # Load before test modules are imported so they re-use pytest's cache
+    load_intent_schemas(getattr(config, "cache", None))
+
+
 def pytest_generate_tests(metafunc):
     # if the argument is specified in the list of test "fixturenames".
     if "language" in metafunc.fixturenames:
@@ -30,8 +35,7 @@ def pytest_generate_tests(metafunc):
 @pytest.fixture(scope="session")
 def intent_schemas() -> dict[str, Any]:
     """Loads the base intents file"""
-    with open(INTENTS_FILE, "r", encoding="utf-8") as schema_file:
-        return yaml.safe_load(schema_file)
+    return load_intent_schemas()
 
 
 @pytest.fixture(name="language_sentences_yaml", scope="session")
@@ -1,11 +1,13 @@
 """Slot combination tests."""
 
+import functools
 import itertools
+import os
 import sys
-from collections import defaultdict
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Optional
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
 
 import pytest
 import yaml
@@ -17,24 +19,73 @@ from hassil import (
     normalize_whitespace,
     recognize_best,
 )
-from jinja2 import BaseLoader, Environment, StrictUndefined
+from jinja2 import BaseLoader, Environment, StrictUndefined, Template
 
 from . import (
     BASE_DIR,
-    INTENTS_FILE,
     LISTS_DIR,
     RESPONSES_DIR,
     RULES_DIR,
     SENTENCES_DIR,
     TESTS_DIR,
+    SafeLoader,
+    load_intent_schemas,
 )
 
 CONTEXT_AREA_NAME = "__context_area__"
+INTENT_CONTEXT: dict[str, Any] = {"area": CONTEXT_AREA_NAME}
 TEST_DATETIME = datetime(year=2013, month=9, day=17, hour=1, minute=2)
 LANGUAGES_TO_TEST = {"en"}
+TIMER_DEFAULTS: dict[str, Any] = {
+    "name": "",
+    "area": "",
+    "is_active": False,
+    "total_seconds_left": 0,
+    "start_hours": 0,
+    "start_minutes": 0,
+    "start_seconds": 0,
+    "rounded_hours_left": 0,
+    "rounded_minutes_left": 0,
+    "rounded_seconds_left": 0,
+}
+
+# path -> (mtime, parsed YAML)
+_YAML_CACHE: dict[Path, tuple[float, Any]] = {}
+
+
+def _load_yaml(yaml_path: Path) -> Any:
+    """Load a YAML file, re-using the parsed result if it hasn't changed.
+
+    The returned object is shared, so callers must copy it before mutating.
+    """
+    mtime = yaml_path.stat().st_mtime
+    cached = _YAML_CACHE.get(yaml_path)
+    if (cached is not None) and (cached[0] == mtime):
+        return cached[1]
+
+    yaml_data = yaml.load(yaml_path.read_bytes(), Loader=SafeLoader)
+    _YAML_CACHE[yaml_path] = (mtime, yaml_data)
+    return yaml_data
+
+
+@functools.lru_cache(maxsize=4096)
+def _normalize_response(response_text: str) -> str:
+    """Normalize whitespace in rendered response text."""
+    return normalize_whitespace(response_text).strip()
+
+
+def _iter_yaml(yaml_dir: Path) -> Iterable[Path]:
+    """Yield the YAML files directly inside a directory (if it exists)."""
+    if not yaml_dir.is_dir():
+        return
+
+    with os.scandir(yaml_dir) as entries:
+        for entry in entries:
+            if entry.name.endswith(".yaml") and entry.is_file():
+                yield Path(entry.path)
 
 
-@dataclass
+@dataclass(slots=True)
 class LanguageResources:
     language: str
     """Language code."""
@@ -51,6 +102,9 @@ class LanguageResources:
         )
     )
 
+    compiled_templates: dict[str, Union[Template, str]] = field(default_factory=dict)
+    """Compiled response templates by source text (final text if static)."""
+
 
 @pytest.fixture(name="lang_resources", scope="session")
 def lang_resources_fixture(language: str, intent_schemas: dict[str, Any]):
@@ -63,23 +117,20 @@ def lang_resources_fixture(language: str, intent_schemas: dict[str, Any]):
 
     # Load expansion rules
     rules_dict: dict[str, Any] = lang_intents_dict["expansion_rules"]
-    for rule_path in (RULES_DIR / language).glob("*.yaml"):
-        with open(rule_path, "r", encoding="utf-8") as rule_file:
-            rule_dict = yaml.safe_load(rule_file)
-            rules_dict.update(rule_dict["expansion_rules"])
+    for rule_path in _iter_yaml(RULES_DIR / language):
+        rule_dict = _load_yaml(rule_path)
+        rules_dict.update(rule_dict["expansion_rules"])
 
     # Load shared lists
     lists_dict: dict[str, Any] = lang_intents_dict["lists"]
-    for list_path in LISTS_DIR.glob("*.yaml"):
-        with open(list_path, "r", encoding="utf-8") as list_file:
-            list_dict = yaml.safe_load(list_file)
-            lists_dict.update(list_dict["lists"])
+    for list_path in _iter_yaml(LISTS_DIR):
+        list_dict = _load_yaml(list_path)
+        lists_dict.update(list_dict["lists"])
 
     # Load language-specific lists
-    for list_path in (LISTS_DIR / language).glob("*.yaml"):
-        with open(list_path, "r", encoding="utf-8") as list_file:
-            list_dict = yaml.safe_load(list_file)
-            lists_dict.update(list_dict["lists"])
+    for list_path in _iter_yaml(LISTS_DIR / language):
+        list_dict = _load_yaml(list_path)
+        lists_dict.update(list_dict["lists"])
 
     responses: dict[str, dict[str, str]] = {}
     for intent_name, intent_info in intent_schemas.items():
@@ -88,9 +139,7 @@ def lang_resources_fixture(language: str, intent_schemas: dict[str, Any]):
 
         responses_path = RESPONSES_DIR / language / f"{intent_name}.yaml"
         if responses_path.exists():
-            with open(responses_path, "r", encoding="utf-8") as responses_file:
-                responses_dict = yaml.safe_load(responses_file)
-
+            responses_dict = _load_yaml(responses_path)
             responses[intent_name] = responses_dict["responses"]["intents"][intent_name]
         else:
             responses[intent_name] = {}  # no responses
@@ -102,41 +151,40 @@ def lang_resources_fixture(language: str, intent_schemas: dict[str, Any]):
             if not sentences_path.exists():
                 continue
 
-            with open(sentences_path, "r", encoding="utf-8") as sentences_file:
-                test_data_dict = yaml.safe_load(sentences_file)
-
-                for test_sentences_dict in test_data_dict["data"]:
-                    test_slots = test_sentences_dict.get("slots", {})
-                    test_metadata = test_sentences_dict.get("metadata", {})
-                    test_requires_context = test_sentences_dict.get(
-                        "requires_context", {}
-                    )
-
-                    if name_domains := test_sentences_dict.get("name_domains"):
-                        test_requires_context["domain"] = name_domains
-                    elif inferred_domain := test_sentences_dict.get("inferred_domain"):
-                        test_slots["domain"] = inferred_domain
-
-                    # Add context area slot
-                    if combo_info.get("context_area"):
-                        test_requires_context["area"] = {"slot": True}
-
-                    # Attach metadata so we can check the slot combination later
-                    test_metadata["slot_combination"] = combo_name
-                    test_metadata["sentence_templates"] = test_sentences_dict[
-                        "sentences"
-                    ]
-
-                    # Convert to hassil format
-                    intent_data.append(
-                        {
-                            "sentences": test_sentences_dict["sentences"],
-                            "slots": test_slots,
-                            "metadata": test_metadata,
-                            "requires_context": test_requires_context,
-                            "response": test_sentences_dict["response"],
-                        }
-                    )
+            test_data_dict = _load_yaml(sentences_path)
+
+            for test_sentences_dict in test_data_dict["data"]:
+                # Only the dicts modified below are copied; the rest is shared
+                # with the YAML cache.
+                test_slots = dict(test_sentences_dict.get("slots", {}))
+                test_metadata = dict(test_sentences_dict.get("metadata", {}))
+                test_requires_context = dict(
+                    test_sentences_dict.get("requires_context", {})
+                )
+
+                if name_domains := test_sentences_dict.get("name_domains"):
+                    test_requires_context["domain"] = name_domains
+                elif inferred_domain := test_sentences_dict.get("inferred_domain"):
+                    test_slots["domain"] = inferred_domain
+
+                # Add context area slot
+                if combo_info.get("context_area"):
+                    test_requires_context["area"] = {"slot": True}
+
+                # Attach metadata so we can check the slot combination later
+                test_metadata["slot_combination"] = combo_name
+                test_metadata["sentence_templates"] = test_sentences_dict["sentences"]
+
+                # Convert to hassil format
+                intent_data.append(
+                    {
+                        "sentences": test_sentences_dict["sentences"],
+                        "slots": test_slots,
+                        "metadata": test_metadata,
+                        "requires_context": test_requires_context,
+                        "response": test_sentences_dict["response"],
+                    }
+                )
 
         lang_intents_dict["intents"][intent_name] = intent_dict
 
@@ -176,24 +224,17 @@ def do_test_slot_combination(
     if not test_file_path.exists():
         return
 
-    with open(test_file_path, "r", encoding="utf-8") as test_file:
-        test_dict = yaml.safe_load(test_file)
+    # Shared with the YAML cache, so it must not be modified
+    test_dict = _load_yaml(test_file_path)
 
     # Load test fixtures
     slot_lists: dict[str, SlotList] = {
         "name": TextSlotList.from_tuples(
             [
                 # text in, value out, context, metadata
-                (
-                    e["name"],
-                    e["name"],
-                    {"domain": e["domain"]},
-                    {  # metadata
-                        "domain": e["domain"],
-                        "state": e.get("state"),
-                        "state_with_unit": e.get("state_with_unit"),
-                    },
-                )
+                # The entity itself is used as metadata ("domain", "state", and
+                # "state_with_unit") without copying since it is only read.
+                (e["name"], e["name"], {"domain": e["domain"]}, e)
                 for e in test_dict.get("entities", [])
             ],
             name="name",
@@ -210,11 +251,14 @@ def do_test_slot_combination(
     media: list[dict[str, Any]] = test_dict.get("media", [])
 
     # For quick look-up during individual tests
-    entity_domains_by_name: dict[str, set[str]] = defaultdict(set)
+    entity_domains_by_name: dict[str, set[str]] = {}
     for test_entity in test_dict.get("entities", []):
-        entity_domains_by_name[test_entity["name"]].add(test_entity["domain"])
+        entity_domains_by_name.setdefault(test_entity["name"], set()).add(
+            test_entity["domain"]
+        )
 
-    possible_slot_names: set[str] = set(combo_info["slots"])
+    possible_slot_names: frozenset[str] = frozenset(combo_info["slots"])
+    has_context_area = bool(combo_info.get("context_area"))
     name_domains: set[str] = set(
         itertools.chain.from_iterable(combo_info.get("name_domains", {}).values())
     )
@@ -228,9 +272,21 @@ def do_test_slot_combination(
     # sentence text -> matched template
     matching_sentence_templates: dict[str, str] = {}
 
+    intents = lang_resources.intents
+
+    # Local names are faster than globals in the sentence loop below
+    recognize = recognize_best
+    render_response = _render_response
+    intent_context = INTENT_CONTEXT
+    context_area_name = CONTEXT_AREA_NAME
+
+    # Re-used across sentences to avoid allocating a dict each time
+    actual_slots: dict[str, Any] = {}
+
     # TODO: add validation in script
     for test_group in test_dict["tests"]:
-        expected_slots = test_group.get("slots", {})
+        # Copied since the test data is shared
+        expected_slots = dict(test_group.get("slots", {}))
 
         if inferred_domains:
             expected_slots["domain"] = inferred_domains
@@ -241,14 +297,15 @@ def do_test_slot_combination(
         expected_response = test_group["response"]
         group_timers = test_group.get("timers", timers)
         group_media = test_group.get("media", media)
+        expected_items = tuple(expected_slots.items())
 
         for test_sentence in test_group["sentences"]:
             sentence_error_info = f"sentence='{test_sentence}', {error_info}"
-            result = recognize_best(
+            result = recognize(
                 test_sentence,
-                lang_resources.intents,
+                intents,
                 slot_lists=slot_lists,
-                intent_context={"area": CONTEXT_AREA_NAME},
+                intent_context=intent_context,
                 best_slot_name="name",
             )
             assert (
@@ -272,28 +329,29 @@ def do_test_slot_combination(
             untested_sentence_templates.discard(result.intent_sentence.text)
             matching_sentence_templates[test_sentence] = result.intent_sentence.text
 
-            actual_response = _render_response(
+            actual_slots.clear()
+            actual_slots.update(
+                (e_name, e.value) for e_name, e in result.entities.items()
+            )
+            actual_response = render_response(
                 lang_resources,
                 result,
                 template_slots={
                     "timers": group_timers,
                     "media": group_media[0] if group_media else None,
                 },
+                entity_values=actual_slots,
             )
             assert (
                 actual_response == expected_response
             ), f"Wrong response: {sentence_error_info}"
 
-            actual_slots = {e_name: e.value for e_name, e in result.entities.items()}
-
-            if combo_info.get("context_area"):
+            if has_context_area:
                 # Remove context area
                 assert (
-                    actual_slots.pop("area") == CONTEXT_AREA_NAME
+                    actual_slots.pop("area") == context_area_name
                 ), f"Expected context area: {sentence_error_info}"
 
-            actual_slot_names = actual_slots.keys()
-
             if name_domains:
                 actual_name = actual_slots["name"]
                 assert (
@@ -308,12 +366,12 @@ def do_test_slot_combination(
                 ), f"Wrong inferred domain: {sentence_error_info}"
 
             assert (
-                expected_slot_names == actual_slot_names
+                expected_slot_names == actual_slots.keys()
             ), f"Slot names to not match expectations: {sentence_error_info}"
 
-            for actual_slot_name in actual_slot_names:
-                actual_slot_value = actual_slots[actual_slot_name]
-                expected_slot_value = expected_slots[actual_slot_name]
+            # Slot names are equal, so expected and actual can be paired up
+            for slot_name, expected_slot_value in expected_items:
+                actual_slot_value = actual_slots[slot_name]
 
                 # Multiple values are possible for some slots.
                 # For example, "open the curtains" may match shades as well.
@@ -347,6 +405,7 @@ def _render_response(
     lang_resources: LanguageResources,
     result: RecognizeResult,
     template_slots: Optional[dict[str, Any]] = None,
+    entity_values: Optional[dict[str, Any]] = None,
 ) -> str:
     intent_name = result.intent.name
     response_key = result.response or "default"
@@ -359,10 +418,26 @@ def _render_response(
     if not response_template:
         return ""
 
+    template = lang_resources.compiled_templates.get(response_template)
+    if template is None:
+        if any(tag in response_template for tag in ("{{", "{%", "{#")):
+            template = lang_resources.template_env.from_string(response_template)
+        else:
+            # No Jinja tags, so the text is the same for every render
+            template = _normalize_response(response_template)
+
+        lang_resources.compiled_templates[response_template] = template
+
+    if isinstance(template, str):
+        return template
+
     if template_slots is None:
         template_slots = {}
 
-    template_slots.update({e_name: e.value for e_name, e in result.entities.items()})
+    if entity_values is None:
+        entity_values = {e_name: e.value for e_name, e in result.entities.items()}
+
+    template_slots.update(entity_values)
     template_args = {"slots": template_slots}
 
     if name_entity := result.entities.get("name"):
@@ -390,29 +465,16 @@ def _render_response(
 
     if intent_name == "HassGetCurrentDate":
         template_slots["date"] = TEST_DATETIME.date()
-    elif intent_name == "HassGetCurrentDate":
+    elif intent_name == "HassGetCurrentTime":
         template_slots["time"] = TEST_DATETIME.time()
 
     if timers := template_slots.get("timers"):
-        # Add missing fields
-        for timer_dict in timers:
-            timer_dict.setdefault("name", "")
-            timer_dict.setdefault("area", "")
-            timer_dict.setdefault("is_active", False)
-            timer_dict.setdefault("total_seconds_left", 0)
-            timer_dict.setdefault("start_hours", 0)
-            timer_dict.setdefault("start_minutes", 0)
-            timer_dict.setdefault("start_seconds", 0)
-            timer_dict.setdefault("rounded_hours_left", 0)
-            timer_dict.setdefault("rounded_minutes_left", 0)
-            timer_dict.setdefault("rounded_seconds_left", 0)
-
-    response_text = lang_resources.template_env.from_string(response_template).render(
-        template_args
-    )
-    response_text = normalize_whitespace(response_text).strip()
+        # Add missing fields (copied since the test data is shared)
+        template_slots["timers"] = [
+            {**TIMER_DEFAULTS, **timer_dict} for timer_dict in timers
+        ]
 
-    return response_text
+    return _normalize_response(template.render(template_args))
 
 
 def gen_test(intent_name: str, combo_name: str, combo_info: dict[str, Any]) -> None:
@@ -429,8 +491,7 @@ def gen_test(intent_name: str, combo_name: str, combo_info: dict[str, Any]) -> N
 
 
 def gen_tests() -> None:
-    with open(INTENTS_FILE, "r", encoding="utf-8") as schemas_file:
-        intent_schemas = yaml.safe_load(schemas_file)
+    intent_schemas = load_intent_schemas()
 
     for intent_name, intent_info in sorted(intent_schemas.items()):
         for combo_name, combo_info in sorted(intent_info["slot_combinations"].items()):